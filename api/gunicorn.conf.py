@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration for production deployment
+
+Usage (from the api/ directory):
+    gunicorn main:app
+
+Each worker is a separate process with its own interpreter, so CPU-bound
+schema scoring and compression scale across cores instead of sharing one GIL.
+UvicornWorker picks uvloop and httptools automatically when installed
+(both come with uvicorn[standard]).
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", 2 * multiprocessing.cpu_count() + 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+keepalive = 5
+timeout = 120
+
+# Load the app (ontology, lookup tables, cached responses) once, before forking
+preload_app = True
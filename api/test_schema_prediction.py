@@ -0,0 +1,45 @@
+"""
+Tests for schema mapping prediction
+"""
+
+import json
+import os
+
+import numpy as np
+
+from api import main
+from api.similarity import cmcwpa_similarity
+from data_generation.synthetic_schema import SyntheticSchemaGenerator
+
+GROUND_TRUTH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'data_generation', 'output', 'ground_truth_mapping.json')
+
+
+def _all_name_similarities(field_lower, related, other_scores):
+    """Unpruned reference: CMCWPA similarity to every unrelated property"""
+    similarity = np.zeros(len(main.ONT_PROPS))
+    for i in np.flatnonzero(~related).tolist():
+        similarity[i] = cmcwpa_similarity(field_lower, main.ONT_PROPS[i][1])
+    return similarity
+
+
+def test_pruned_top3_matches_unpruned(monkeypatch):
+    """Skipping properties that cannot reach the top 3 does not change predictions"""
+    with open(GROUND_TRUTH) as f:
+        fields = [
+            {key: mapping[key] for key in ('table_name', 'field_name', 'data_type')}
+            for mapping in json.load(f)['field_mappings']
+        ]
+    data_types = ['VARCHAR(255)', 'INT', 'DECIMAL(10,2)', 'DATE', 'BOOLEAN']
+    messy_names = sorted({name for names in SyntheticSchemaGenerator.MESSY_PATTERNS.values() for name in names})
+    fields += [
+        {'table_name': 'orders_tbl', 'field_name': name, 'data_type': data_types[i % len(data_types)]}
+        for i, name in enumerate(messy_names)
+    ]
+    request = main.SchemaMappingRequest(fields=fields)
+
+    pruned = main._predict_schema_mappings(request)
+    monkeypatch.setattr(main, '_name_similarities', _all_name_similarities)
+    unpruned = main._predict_schema_mappings(request)
+
+    assert pruned == unpruned
@@ -0,0 +1,54 @@
+"""
+Tests for CMCWPA name similarity
+"""
+
+import json
+import os
+
+import numpy as np
+
+from api.similarity import cmcwpa_similarity, name_profile, PROFILE_ALPHABET
+
+GROUND_TRUTH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'data_generation', 'output', 'ground_truth_mapping.json')
+
+
+def test_known_pairs():
+    """Identical, disjoint and differently-separated names score as expected"""
+    assert cmcwpa_similarity('customerid', 'customerid') == 1.0
+    assert cmcwpa_similarity('abc', 'xyz') == 0.0
+    assert cmcwpa_similarity('', 'customerid') == 0.0
+
+    # camelCase (lowercased) vs snake_case: 'customer' and 'id' both match,
+    # 2 * (8^2 + 2^2) / (10^2 + 8^2 + 2^2)
+    assert cmcwpa_similarity('customerid', 'customer_id') == 2.0 * 68 / 168
+
+    # Symmetric for these pairs and bounded to [0, 1]
+    assert cmcwpa_similarity('customer_id', 'customerid') == cmcwpa_similarity('customerid', 'customer_id')
+    assert 0.0 < cmcwpa_similarity('cust_eml', 'email') < 1.0
+
+
+def test_name_profile():
+    """Profiles hold the squared token lengths, longest token and character counts"""
+    norm, longest, counts = name_profile('cust_id-2')
+    assert norm == 4 ** 2 + 2 ** 2 + 1
+    assert longest == 4
+    assert counts.sum() == 7
+    assert counts[PROFILE_ALPHABET.index('c')] == 1
+    assert counts[PROFILE_ALPHABET.index('2')] == 1
+
+
+def test_profile_bound_holds():
+    """The bound used to prune scoring never falls below the actual similarity"""
+    with open(GROUND_TRUTH) as f:
+        mappings = json.load(f)['field_mappings']
+
+    for mapping in mappings:
+        x = mapping['field_name'].lower()
+        y = mapping['ontology_property'].lower()
+        x_norm, x_longest, x_counts = name_profile(x)
+        y_norm, y_longest, y_counts = name_profile(y)
+        shared = int(np.minimum(x_counts, y_counts).sum())
+        max_matched = min(x_norm, y_norm, shared * min(x_longest, y_longest))
+        bound = 2.0 * max_matched / (x_norm + y_norm) if x_norm + y_norm else 0.0
+        assert cmcwpa_similarity(x, y) <= bound + 1e-12, (x, y)
@@ -5,6 +5,7 @@ Compresses data using ontology-aware encoding to reduce token usage.
 """
 
 import json
+import orjson
 from typing import Dict, Any, List
 from ontology import get_ontology
 
@@ -17,6 +18,7 @@ class OntologyCompressor:
 
         # Build abbreviation mappings
         self.property_abbrev = self._build_abbreviations()
+        self.abbrev_to_prop = {v: k for k, v in self.property_abbrev.items()}
 
     def _build_abbreviations(self) -> Dict[str, str]:
         """Build property abbreviations"""
@@ -96,13 +98,10 @@ class OntologyCompressor:
         Returns:
             Decompressed record (with full property names)
         """
-        # Reverse mapping
-        abbrev_to_prop = {v: k for k, v in self.property_abbrev.items()}
-
         decompressed = {}
         for short_key, value in compressed.items():
             # Find full property name
-            full_prop = abbrev_to_prop.get(short_key, short_key)
+            full_prop = self.abbrev_to_prop.get(short_key, short_key)
             decompressed[full_prop] = value
 
         return decompressed
@@ -129,20 +128,21 @@ if __name__ == '__main__':
         'customerTier': 'gold'
     }
 
+    original_size = len(orjson.dumps(test_record))
+
     print("Original record:")
     print(json.dumps(test_record, indent=2))
-    print(f"Size: {len(json.dumps(test_record))} chars\n")
+    print(f"Size: {original_size} chars\n")
 
     # Compress
     compressed = compressor.compress_record(test_record, 'Customer')
+    compressed_size = len(orjson.dumps(compressed))
 
     print("Compressed record:")
     print(json.dumps(compressed, indent=2))
-    print(f"Size: {len(json.dumps(compressed))} chars\n")
+    print(f"Size: {compressed_size} chars\n")
 
     # Calculate reduction
-    original_size = len(json.dumps(test_record))
-    compressed_size = len(json.dumps(compressed))
     reduction = (1 - compressed_size / original_size) * 100
 
     print(f"Compression: {reduction:.1f}% reduction")
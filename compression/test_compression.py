@@ -0,0 +1,21 @@
+"""
+Tests for the compression module
+"""
+
+from compression.compressor_v2 import AdvancedCompressor
+
+
+def test_batch_round_trip_many_prefixes():
+    """Batches with more than 10 frequent prefixes decompress to the original values"""
+    compressor = AdvancedCompressor()
+    records = [
+        {'customerId': f"A{i % 15}-{(i * 37) % 1000:03d}", 'email': f"user{i}@example.com"}
+        for i in range(200)
+    ]
+
+    compressed = compressor.compress_batch(records, 'Customer')
+    assert len([ref for ref in compressed['p'].values() if ref.startswith('$p')]) == 15
+
+    decompressed = compressor.decompress_batch(compressed)
+    assert [record['customerId'] for record in decompressed] == [record['customerId'] for record in records]
+    assert [record['email'] for record in decompressed] == [record['email'] for record in records]
@@ -5,7 +5,11 @@ Measures token usage with proper tokenizer.
 """
 
 import json
-from typing import Dict, List
+import orjson
+from typing import Any, Dict, List
+
+# Rough approximation: ~1 token per 4 characters
+CHARS_PER_TOKEN = 4
 
 
 def simple_token_count(text: str) -> int:
@@ -14,8 +18,18 @@ def simple_token_count(text: str) -> int:
 
     In production, use: tiktoken.encoding_for_model("gpt-4").encode(text)
     """
-    # Rough approximation: ~1 token per 4 characters
-    return len(text) // 4
+    return len(text) // CHARS_PER_TOKEN
+
+
+def json_char_count(obj: Any) -> int:
+    """
+    Length of obj's compact JSON in characters
+
+    ASCII output (the usual case) is measured on orjson's bytes directly;
+    only non-ASCII output is decoded to count characters.
+    """
+    data = orjson.dumps(obj)
+    return len(data) if data.isascii() else len(data.decode())
 
 
 def measure_compression(original: Dict, compressed: Dict) -> Dict[str, float]:
@@ -25,14 +39,12 @@ def measure_compression(original: Dict, compressed: Dict) -> Dict[str, float]:
     Returns:
         Dictionary with metrics
     """
-    original_json = json.dumps(original)
-    compressed_json = json.dumps(compressed)
-
-    original_chars = len(original_json)
-    compressed_chars = len(compressed_json)
+    original_chars = json_char_count(original)
+    compressed_chars = json_char_count(compressed)
 
-    original_tokens = simple_token_count(original_json)
-    compressed_tokens = simple_token_count(compressed_json)
+    # simple_token_count only depends on the length
+    original_tokens = original_chars // CHARS_PER_TOKEN
+    compressed_tokens = compressed_chars // CHARS_PER_TOKEN
 
     char_reduction = (1 - compressed_chars / original_chars) * 100
     token_reduction = (1 - compressed_tokens / original_tokens) * 100
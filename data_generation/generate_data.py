@@ -4,234 +4,335 @@ Synthetic Data Generator
 Generates realistic synthetic data records based on schemas.
 """
 
-import json
 import random
 import string
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
 from faker import Faker
 
 from data_generation.synthetic_schema import SchemaTable, SchemaField
 
+# Value pools for random.choice, shared by every generated record
+PRODUCT_CATEGORIES = ('Electronics', 'Clothing', 'Home & Garden', 'Sports', 'Books')
+PRODUCT_LINES = ('Pro', 'Elite', 'Classic', 'Premium', 'Standard')
+BRANDS = ('Samsung', 'Apple', 'Sony', 'LG', 'Nike', 'Adidas', 'Dell', 'HP')
+CATEGORY_NAMES = ('Electronics', 'Phones', 'Laptops', 'Tablets', 'Accessories', 'Clothing', 'Shoes')
+TICKET_SUBJECTS = (
+    'Order delivery issue',
+    'Product defect',
+    'Payment problem',
+    'Return request',
+    'General inquiry'
+)
+CARRIERS = ('FedEx', 'UPS', 'DHL', 'USPS', 'Amazon Logistics')
+WAREHOUSE_REGIONS = ('EAST', 'WEST', 'NORTH', 'SOUTH')
+ORDER_STATUSES = ('pending', 'confirmed', 'processing', 'shipped', 'delivered')
+PAYMENT_STATUSES = ('pending', 'completed', 'failed')
+SHIPMENT_STATUSES = ('preparing', 'in_transit', 'delivered')
+STATUSES = ('active', 'inactive', 'pending')
+TIERS = ('bronze', 'silver', 'gold', 'platinum')
+PAYMENT_METHODS = ('credit_card', 'debit_card', 'paypal', 'bank_transfer')
+SHIPPING_METHODS = ('standard', 'express', 'overnight', 'economy')
+ADDRESS_TYPES = ('shipping', 'billing', 'both')
+DISCOUNT_TYPES = ('percentage', 'fixed_amount', 'free_shipping')
+TRANSACTION_TYPES = ('sale', 'refund', 'adjustment')
+PRIORITIES = ('low', 'medium', 'high', 'critical')
+STORAGE_SIZES = (64, 128, 256, 512, 1024)
+RAM_SIZES = (4, 8, 16, 32, 64)
+BOOLEANS = (True, False)
+CURRENCIES = ('USD', 'EUR', 'GBP', 'JPY')
+VOLTAGES = ('110V', '220V', '240V')
+OPERATING_SYSTEMS = ('iOS', 'Android', 'Windows', 'macOS')
+PROCESSORS = ('Intel i5', 'Intel i7', 'AMD Ryzen 5', 'AMD Ryzen 7', 'Apple M1')
+GRAPHICS_CARDS = ('NVIDIA RTX 3060', 'AMD Radeon RX 6700', 'Intel Iris', 'Integrated')
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+
+
+def _call(fn: Callable, *args, **kwargs) -> Callable[[int], Any]:
+    """Value generator that ignores the record id and calls fn(*args, **kwargs)"""
+    return lambda record_id: fn(*args, **kwargs)
+
+
+def _uniform(low: float, high: float, digits: int) -> Callable[[int], Any]:
+    """Value generator for a uniform float rounded to the given digits"""
+    return lambda record_id: round(random.uniform(low, high), digits)
+
+
+def _days_from_now(low: int, high: int, direction: int, now: datetime, timestamps: Dict[int, str]) -> Callable[[int], Any]:
+    """
+    Value generator for an ISO timestamp low..high days before (-1) or after (1) now
+
+    Timestamps are formatted once per day offset and shared through the
+    timestamps dict, which must belong to the same now.
+    """
+    def generate(record_id: int) -> str:
+        offset = direction * random.randint(low, high)
+        timestamp = timestamps.get(offset)
+        if timestamp is None:
+            timestamp = timestamps[offset] = (now + timedelta(days=offset)).isoformat()
+        return timestamp
+    return generate
+
 
 class SyntheticDataGenerator:
     """Generates realistic synthetic data"""
 
     def __init__(self, seed: int = 42):
-        self.faker = Faker()
+        self.faker = Faker(use_weighting=False)
+        self.seed = seed
+        self._reseed(seed)
+
+    @staticmethod
+    def _reseed(seed: int):
+        """Seed the shared Faker and random streams"""
         Faker.seed(seed)
         random.seed(seed)
 
+    def table_seed(self, table_name: str) -> int:
+        """Seed for one table, stable across processes (unlike hash())"""
+        return (self.seed + zlib.crc32(table_name.encode())) & 0xffffffff
+
     def generate_value(self, field: SchemaField, record_id: int) -> Any:
         """Generate a realistic value for a field"""
+        return self._compile_field(field)(record_id)
+
+    def _compile_field(
+        self,
+        field: SchemaField,
+        now: Optional[datetime] = None,
+        timestamps: Optional[Dict[int, str]] = None
+    ) -> Callable[[int], Any]:
+        """
+        Resolve the value generator for a field once
+
+        Returns a callable taking the record id; it makes the same random
+        and faker calls generate_value would for that field. Relative dates
+        are computed from now (default: the current time) and cached in
+        timestamps.
+        """
+        if now is None:
+            now = datetime.now()
+        if timestamps is None:
+            timestamps = {}
+
         prop_name = field.ontology_property.lower()
         data_type = field.data_type.upper()
+        faker = self.faker
 
         # Handle IDs
         if field.is_primary_key or 'id' in prop_name:
-            return f"{field.ontology_class[:3].upper()}-{record_id:06d}"
+            id_prefix = field.ontology_class[:3].upper()
+            return lambda record_id: f"{id_prefix}-{record_id:06d}"
 
         # Handle specific properties with realistic data
         if 'email' in prop_name:
-            return self.faker.email()
+            return _call(faker.email)
         elif 'firstname' in prop_name or 'fname' in prop_name:
-            return self.faker.first_name()
+            return _call(faker.first_name)
         elif 'lastname' in prop_name or 'lname' in prop_name:
-            return self.faker.last_name()
+            return _call(faker.last_name)
         elif 'phone' in prop_name:
-            return self.faker.phone_number()
+            return _call(faker.phone_number)
         elif 'dateofbirth' in prop_name or 'dob' in prop_name:
-            return self.faker.date_of_birth(minimum_age=18, maximum_age=80).isoformat()
+            return lambda record_id: faker.date_of_birth(minimum_age=18, maximum_age=80).isoformat()
         elif 'street' in prop_name or 'address' in prop_name:
-            return self.faker.street_address()
+            return _call(faker.street_address)
         elif 'city' in prop_name:
-            return self.faker.city()
+            return _call(faker.city)
         elif 'state' in prop_name:
-            return self.faker.state()
+            return _call(faker.state)
         elif 'postal' in prop_name or 'zip' in prop_name:
-            return self.faker.postcode()
+            return _call(faker.postcode)
         elif 'country' in prop_name:
-            return self.faker.country()
+            return _call(faker.country)
         elif 'product' in prop_name and 'name' in prop_name:
-            categories = ['Electronics', 'Clothing', 'Home & Garden', 'Sports', 'Books']
-            items = ['Pro', 'Elite', 'Classic', 'Premium', 'Standard']
-            return f"{random.choice(categories)} {random.choice(items)} {random.randint(1000, 9999)}"
+            return lambda record_id: (
+                f"{random.choice(PRODUCT_CATEGORIES)} {random.choice(PRODUCT_LINES)} {random.randint(1000, 9999)}"
+            )
         elif 'brand' in prop_name:
-            return random.choice(['Samsung', 'Apple', 'Sony', 'LG', 'Nike', 'Adidas', 'Dell', 'HP'])
+            return _call(random.choice, BRANDS)
         elif 'category' in prop_name and 'name' in prop_name:
-            return random.choice(['Electronics', 'Phones', 'Laptops', 'Tablets', 'Accessories', 'Clothing', 'Shoes'])
+            return _call(random.choice, CATEGORY_NAMES)
         elif 'sku' in prop_name:
-            return f"SKU-{random.randint(100000, 999999)}"
+            return lambda record_id: f"SKU-{random.randint(100000, 999999)}"
         elif 'description' in prop_name or 'desc' in prop_name:
-            return self.faker.text(max_nb_chars=200)
+            return _call(faker.text, max_nb_chars=200)
         elif 'subject' in prop_name:
-            return random.choice([
-                'Order delivery issue',
-                'Product defect',
-                'Payment problem',
-                'Return request',
-                'General inquiry'
-            ])
+            return _call(random.choice, TICKET_SUBJECTS)
         elif 'vendor' in prop_name and 'name' in prop_name:
-            return self.faker.company()
+            return _call(faker.company)
         elif 'carrier' in prop_name:
-            return random.choice(['FedEx', 'UPS', 'DHL', 'USPS', 'Amazon Logistics'])
+            return _call(random.choice, CARRIERS)
         elif 'tracking' in prop_name:
-            return f"TRK{random.randint(10**10, 10**11-1)}"
+            return lambda record_id: f"TRK{random.randint(10**10, 10**11-1)}"
         elif 'warehouse' in prop_name:
-            return f"WH-{random.choice(['EAST', 'WEST', 'NORTH', 'SOUTH'])}-{random.randint(1, 20)}"
+            return lambda record_id: f"WH-{random.choice(WAREHOUSE_REGIONS)}-{random.randint(1, 20)}"
 
         # Handle status/state fields
         elif 'orderstatus' in prop_name or ('order' in prop_name and 'status' in prop_name):
-            return random.choice(['pending', 'confirmed', 'processing', 'shipped', 'delivered'])
+            return _call(random.choice, ORDER_STATUSES)
         elif 'paymentstatus' in prop_name or ('payment' in prop_name and 'status' in prop_name):
-            return random.choice(['pending', 'completed', 'failed'])
+            return _call(random.choice, PAYMENT_STATUSES)
         elif 'shipmentstatus' in prop_name or ('shipment' in prop_name and 'status' in prop_name):
-            return random.choice(['preparing', 'in_transit', 'delivered'])
+            return _call(random.choice, SHIPMENT_STATUSES)
         elif 'status' in prop_name:
-            return random.choice(['active', 'inactive', 'pending'])
+            return _call(random.choice, STATUSES)
 
         # Handle tier/level fields
         elif 'tier' in prop_name or 'level' in prop_name:
-            return random.choice(['bronze', 'silver', 'gold', 'platinum'])
+            return _call(random.choice, TIERS)
 
         # Handle method/type fields
         elif 'paymentmethod' in prop_name:
-            return random.choice(['credit_card', 'debit_card', 'paypal', 'bank_transfer'])
+            return _call(random.choice, PAYMENT_METHODS)
         elif 'shippingmethod' in prop_name:
-            return random.choice(['standard', 'express', 'overnight', 'economy'])
+            return _call(random.choice, SHIPPING_METHODS)
         elif 'addresstype' in prop_name:
-            return random.choice(['shipping', 'billing', 'both'])
+            return _call(random.choice, ADDRESS_TYPES)
         elif 'discounttype' in prop_name:
-            return random.choice(['percentage', 'fixed_amount', 'free_shipping'])
+            return _call(random.choice, DISCOUNT_TYPES)
         elif 'transactiontype' in prop_name:
-            return random.choice(['sale', 'refund', 'adjustment'])
+            return _call(random.choice, TRANSACTION_TYPES)
         elif 'priority' in prop_name:
-            return random.choice(['low', 'medium', 'high', 'critical'])
+            return _call(random.choice, PRIORITIES)
 
         # Handle numeric types
         elif 'INT' in data_type or 'SMALLINT' in data_type or 'BIGINT' in data_type:
             if 'price' in prop_name or 'amount' in prop_name or 'total' in prop_name or 'value' in prop_name:
-                return round(random.uniform(10, 1000), 2)
+                return _uniform(10, 1000, 2)
             elif 'quantity' in prop_name or 'qty' in prop_name or 'count' in prop_name or 'items' in prop_name:
-                return random.randint(1, 100)
+                return _call(random.randint, 1, 100)
             elif 'rating' in prop_name or 'stars' in prop_name:
-                return random.randint(1, 5)
+                return _call(random.randint, 1, 5)
             elif 'points' in prop_name:
-                return random.randint(0, 10000)
+                return _call(random.randint, 0, 10000)
             elif 'helpful' in prop_name:
-                return random.randint(0, 50)
+                return _call(random.randint, 0, 50)
             elif 'level' in prop_name:
-                return random.randint(0, 5)
+                return _call(random.randint, 0, 5)
             elif 'warranty' in prop_name:
-                return random.randint(6, 36)
+                return _call(random.randint, 6, 36)
             elif 'battery' in prop_name:
-                return random.randint(2000, 5000)
+                return _call(random.randint, 2000, 5000)
             elif 'storage' in prop_name:
-                return random.choice([64, 128, 256, 512, 1024])
+                return _call(random.choice, STORAGE_SIZES)
             elif 'ram' in prop_name:
-                return random.choice([4, 8, 16, 32, 64])
+                return _call(random.choice, RAM_SIZES)
             else:
-                return random.randint(1, 1000)
+                return _call(random.randint, 1, 1000)
 
         # Handle decimal/float types
         elif 'DECIMAL' in data_type or 'NUMERIC' in data_type or 'FLOAT' in data_type or 'DOUBLE' in data_type:
             if 'price' in prop_name or 'amount' in prop_name or 'total' in prop_name or 'value' in prop_name:
-                return round(random.uniform(10, 1000), 2)
+                return _uniform(10, 1000, 2)
             elif 'rating' in prop_name:
-                return round(random.uniform(1, 5), 1)
+                return _uniform(1, 5, 1)
             elif 'weight' in prop_name:
-                return round(random.uniform(0.1, 50), 2)
+                return _uniform(0.1, 50, 2)
             elif 'screen' in prop_name:
-                return round(random.uniform(5.0, 17.0), 1)
+                return _uniform(5.0, 17.0, 1)
             else:
-                return round(random.uniform(1, 100), 2)
+                return _uniform(1, 100, 2)
 
         # Handle boolean types
         elif 'BOOLEAN' in data_type or 'BOOL' in data_type or 'BIT' in data_type or 'TINYINT(1)' in data_type:
             if 'verified' in prop_name:
-                return random.choice([True, False])
+                return _call(random.choice, BOOLEANS)
             elif 'active' in prop_name:
-                return True
+                return lambda record_id: True
             else:
-                return random.choice([True, False])
+                return _call(random.choice, BOOLEANS)
 
         # Handle date/datetime types
         elif 'DATE' in data_type or 'TIMESTAMP' in data_type:
             if 'birth' in prop_name:
-                return self.faker.date_of_birth(minimum_age=18, maximum_age=80).isoformat()
+                return lambda record_id: faker.date_of_birth(minimum_age=18, maximum_age=80).isoformat()
             elif 'registration' in prop_name or 'created' in prop_name or 'join' in prop_name:
-                days_ago = random.randint(1, 365 * 3)
-                return (datetime.now() - timedelta(days=days_ago)).isoformat()
+                return _days_from_now(1, 365 * 3, -1, now, timestamps)
             elif 'order' in prop_name or 'payment' in prop_name or 'transaction' in prop_name:
-                days_ago = random.randint(1, 180)
-                return (datetime.now() - timedelta(days=days_ago)).isoformat()
+                return _days_from_now(1, 180, -1, now, timestamps)
             elif 'review' in prop_name:
-                days_ago = random.randint(1, 90)
-                return (datetime.now() - timedelta(days=days_ago)).isoformat()
+                return _days_from_now(1, 90, -1, now, timestamps)
             elif 'shipment' in prop_name or 'delivery' in prop_name:
-                days_ago = random.randint(0, 30)
-                return (datetime.now() - timedelta(days=days_ago)).isoformat()
+                return _days_from_now(0, 30, -1, now, timestamps)
             elif 'start' in prop_name:
-                days_ago = random.randint(0, 30)
-                return (datetime.now() - timedelta(days=days_ago)).isoformat()
+                return _days_from_now(0, 30, -1, now, timestamps)
             elif 'end' in prop_name or 'expiry' in prop_name:
-                days_ahead = random.randint(1, 90)
-                return (datetime.now() + timedelta(days=days_ahead)).isoformat()
+                return _days_from_now(1, 90, 1, now, timestamps)
             elif 'modified' in prop_name or 'updated' in prop_name:
-                days_ago = random.randint(0, 30)
-                return (datetime.now() - timedelta(days=days_ago)).isoformat()
+                return _days_from_now(0, 30, -1, now, timestamps)
             else:
-                days_ago = random.randint(1, 365)
-                return (datetime.now() - timedelta(days=days_ago)).isoformat()
+                return _days_from_now(1, 365, -1, now, timestamps)
 
         # Handle text/varchar types
         elif 'TEXT' in data_type or 'VARCHAR' in data_type or 'CHAR' in data_type:
             if 'currency' in prop_name:
-                return random.choice(['USD', 'EUR', 'GBP', 'JPY'])
+                return _call(random.choice, CURRENCIES)
             elif 'dimensions' in prop_name:
-                return f"{random.randint(10, 50)}x{random.randint(10, 50)}x{random.randint(5, 30)} cm"
+                return lambda record_id: (
+                    f"{random.randint(10, 50)}x{random.randint(10, 50)}x{random.randint(5, 30)} cm"
+                )
             elif 'voltage' in prop_name:
-                return random.choice(['110V', '220V', '240V'])
+                return _call(random.choice, VOLTAGES)
             elif 'os' in prop_name or 'operating' in prop_name:
-                return random.choice(['iOS', 'Android', 'Windows', 'macOS'])
+                return _call(random.choice, OPERATING_SYSTEMS)
             elif 'processor' in prop_name:
-                return random.choice(['Intel i5', 'Intel i7', 'AMD Ryzen 5', 'AMD Ryzen 7', 'Apple M1'])
+                return _call(random.choice, PROCESSORS)
             elif 'graphics' in prop_name:
-                return random.choice(['NVIDIA RTX 3060', 'AMD Radeon RX 6700', 'Intel Iris', 'Integrated'])
+                return _call(random.choice, GRAPHICS_CARDS)
             elif 'code' in prop_name:
-                return ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+                return lambda record_id: ''.join(random.choices(CODE_ALPHABET, k=8))
             elif 'reference' in prop_name:
-                return f"REF-{random.randint(100000, 999999)}"
+                return lambda record_id: f"REF-{random.randint(100000, 999999)}"
             else:
                 # Generic text
-                return self.faker.catch_phrase()
+                return _call(faker.catch_phrase)
 
         # Default fallback
-        return self.faker.word()
+        return _call(faker.word)
 
     def generate_records(self, schema: SchemaTable, num_records: int = 1000) -> List[Dict]:
         """Generate synthetic records for a schema"""
-        records = []
+        # Field dispatch depends only on the schema, so resolve it once per table;
+        # relative dates share one reference time and formatted-timestamp cache
+        now = datetime.now()
+        timestamps = {}
+        compiled = [(field.field_name, self._compile_field(field, now, timestamps)) for field in schema.fields]
 
-        for i in range(1, num_records + 1):
-            record = {}
-            for field in schema.fields:
-                value = self.generate_value(field, i)
-                record[field.field_name] = value
-            records.append(record)
+        return [
+            {field_name: generate(i) for field_name, generate in compiled}
+            for i in range(1, num_records + 1)
+        ]
 
-        return records
+    def generate_all_data(self, schemas: List[SchemaTable], num_records: int = 1000,
+                          workers: int = 1) -> Dict[str, List[Dict]]:
+        """
+        Generate data for all schemas
 
-    def generate_all_data(self, schemas: List[SchemaTable], num_records: int = 1000) -> Dict[str, List[Dict]]:
-        """Generate data for all schemas"""
-        all_data = {}
+        Every table is seeded from its name, so the output is the same for any
+        number of worker processes.
+        """
+        seeds = [self.table_seed(schema.table_name) for schema in schemas]
 
-        for schema in schemas:
-            records = self.generate_records(schema, num_records)
-            all_data[schema.table_name] = records
+        if workers > 1 and len(schemas) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(schemas))) as executor:
+                tables = list(executor.map(_generate_table, seeds, schemas, [num_records] * len(schemas)))
+        else:
+            tables = []
+            for seed, schema in zip(seeds, schemas):
+                self._reseed(seed)
+                tables.append(self.generate_records(schema, num_records))
 
-        return all_data
+        return {schema.table_name: records for schema, records in zip(schemas, tables)}
+
+
+def _generate_table(seed: int, schema: SchemaTable, num_records: int) -> List[Dict]:
+    """Generate one table's records in a worker process"""
+    return SyntheticDataGenerator(seed).generate_records(schema, num_records)
 
 
 def save_data_to_files(data: Dict[str, List[Dict]], ground_truth: Dict, output_dir: str = 'data_generation/output'):
@@ -239,17 +340,17 @@ def save_data_to_files(data: Dict[str, List[Dict]], ground_truth: Dict, output_d
     import os
     os.makedirs(output_dir, exist_ok=True)
 
-    # Save each table's data as JSON
+    # Save each table's data as JSON (orjson: same indented layout as json.dump, far faster)
     for table_name, records in data.items():
         filepath = os.path.join(output_dir, f"{table_name}.json")
-        with open(filepath, 'w') as f:
-            json.dump(records, f, indent=2, default=str)
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(records, default=str, option=orjson.OPT_INDENT_2))
         print(f"Saved {len(records)} records to {filepath}")
 
     # Save ground truth mapping
     gt_filepath = os.path.join(output_dir, 'ground_truth_mapping.json')
-    with open(gt_filepath, 'w') as f:
-        json.dump(ground_truth, f, indent=2)
+    with open(gt_filepath, 'wb') as f:
+        f.write(orjson.dumps(ground_truth, option=orjson.OPT_INDENT_2))
     print(f"Saved ground truth mapping to {gt_filepath}")
 
     # Save consolidated data
@@ -264,8 +365,8 @@ def save_data_to_files(data: Dict[str, List[Dict]], ground_truth: Dict, output_d
     }
 
     consolidated_filepath = os.path.join(output_dir, 'consolidated_data.json')
-    with open(consolidated_filepath, 'w') as f:
-        json.dump(consolidated, f, indent=2, default=str)
+    with open(consolidated_filepath, 'wb') as f:
+        f.write(orjson.dumps(consolidated, default=str, option=orjson.OPT_INDENT_2))
     print(f"Saved consolidated data to {consolidated_filepath}")
 
 
@@ -304,6 +405,8 @@ def validate_data_distribution(data: Dict[str, List[Dict]]):
 
 
 if __name__ == '__main__':
+    import os
+
     from ontology import get_ontology
     from data_generation.synthetic_schema import generate_synthetic_schemas
 
@@ -321,7 +424,7 @@ if __name__ == '__main__':
     # Generate data
     print("\nGenerating synthetic data (1000 records per table)...")
     generator = SyntheticDataGenerator(seed=42)
-    data = generator.generate_all_data(schemas, num_records=1000)
+    data = generator.generate_all_data(schemas, num_records=1000, workers=os.cpu_count() or 1)
 
     # Validate data
     validate_data_distribution(data)